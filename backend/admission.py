@@ -0,0 +1,226 @@
+import asyncio
+from collections import OrderedDict
+import math
+import os
+import time
+
+from starlette.datastructures import Headers
+
+from database import engine, replica_engines
+from responses import FastJSONResponse
+
+# Token bucket per client: burst size and sustained requests per second
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "30"))
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "5"))
+
+# Optional shared bucket store so limits hold across workers, e.g. redis://localhost:6379/0
+RATE_LIMIT_BACKEND_URL = os.getenv("RATE_LIMIT_BACKEND_URL", "")
+
+# Proxies in front of the app that append to X-Forwarded-For (Render's load balancer is one)
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "1"))
+
+# Concurrent requests per worker allowed on the heavy routes below
+HEAVY_ROUTE_CONCURRENCY = int(os.getenv("HEAVY_ROUTE_CONCURRENCY", "4"))
+
+# Heavy routes are shed once this share of the DB pool is checked out; everything is shed at 100%
+HEAVY_ROUTE_POOL_RATIO = float(os.getenv("HEAVY_ROUTE_POOL_RATIO", "0.75"))
+
+# Token cost per (method, path); unlisted routes cost 1
+ROUTE_COSTS = {
+    ("GET", "/search/playlists"): 5,  # Leading-wildcard LIKE scan
+    ("GET", "/users"): 5,  # Unbounded list with avatars
+}
+
+HEAVY_ROUTES = set(ROUTE_COSTS)
+
+
+class InMemoryBucketBackend:
+    """
+    Token buckets kept in this worker's memory, least recently used evicted first
+    """
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        self.buckets = OrderedDict()
+
+    async def take(self, key, cost, capacity, rate):
+        """
+        Spend cost tokens from key's bucket
+        Returns (allowed, seconds until enough tokens are available)
+        """
+        now = time.monotonic()
+        tokens, updated = self.buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self.buckets[key] = (tokens, now)
+        self.buckets.move_to_end(key)
+
+        # O(1) eviction; the oldest bucket is usually idle long enough to be full anyway
+        if len(self.buckets) > self.MAX_KEYS:
+            self.buckets.popitem(last=False)
+
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBucketBackend:
+    """
+    Token buckets shared by every worker through Redis (atomic Lua update)
+    Any server speaking the Redis protocol works as a local stand-in.
+    """
+    def __init__(self, url):
+        import redis.asyncio  # Only needed when a shared backend is configured
+
+        self.client = redis.asyncio.from_url(url)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key, cost, capacity, rate):
+        allowed, tokens = await self.script(
+            keys=[f"ratelimit:{key}"], args=[capacity, rate, cost, time.time()]
+        )
+        tokens = float(tokens)
+        return bool(allowed), 0.0 if allowed else (cost - tokens) / rate
+
+
+def make_bucket_backend(url=RATE_LIMIT_BACKEND_URL):
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBucketBackend(url)
+    return InMemoryBucketBackend()
+
+
+def _engine_usage(bind):
+    """
+    Share of an engine's pool currently checked out (None if the pool has no fixed size)
+    """
+    pool = bind.pool
+    if not hasattr(pool, "size") or not hasattr(pool, "checkedout"):
+        return None
+    capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+    if capacity <= 0:
+        return None
+    return pool.checkedout() / capacity
+
+
+def pool_usage(method):
+    """
+    Usage of the pools a request will draw from: GETs are served by the
+    replicas when any are configured (see get_read_db), everything else by the primary
+    """
+    engines = replica_engines if method in ("GET", "HEAD") and replica_engines else [engine]
+    usages = [usage for usage in (_engine_usage(bind) for bind in engines) if usage is not None]
+    # Replicas are picked round-robin, so the busiest one decides
+    return max(usages) if usages else None
+
+
+def client_key(scope):
+    """
+    Rate limit per logged-in user, falling back to the client IP
+    """
+    session = scope.get("session") or {}
+    if session.get("user_id"):
+        return f"user:{session['user_id']}"
+
+    # Clients can send any X-Forwarded-For they like; only the hops our own
+    # proxies appended (at the right-hand end) can be trusted
+    forwarded_for = Headers(scope=scope).get("x-forwarded-for")
+    if forwarded_for and TRUSTED_PROXY_HOPS > 0:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        if len(hops) >= TRUSTED_PROXY_HOPS:
+            return f"ip:{hops[-TRUSTED_PROXY_HOPS]}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def _reject(status_code, detail, retry_after):
+    return FastJSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+class AdmissionControlMiddleware:
+    """
+    Per-client token bucket limits, bounded concurrency for heavy routes,
+    and load shedding when the DB pool is saturated
+
+    Must sit inside SessionMiddleware so the session user can be read.
+    """
+    def __init__(self, app, backend=None, pool_usage=pool_usage):
+        self.app = app
+        self.backend = backend or make_bucket_backend()
+        # Per-worker limits while a shared backend is unreachable
+        self.fallback_backend = InMemoryBucketBackend()
+        self.backend_down = False
+        self.pool_usage = pool_usage
+        self.heavy_slots = asyncio.Semaphore(HEAVY_ROUTE_CONCURRENCY)
+
+    async def take(self, key, cost):
+        """
+        Spend tokens from the shared backend, falling back to this worker's own
+        buckets if it fails, so a rate limiter outage never takes the API down
+        """
+        try:
+            result = await self.backend.take(key, cost, RATE_LIMIT_BURST, RATE_LIMIT_PER_SECOND)
+        except Exception as e:
+            if not self.backend_down:
+                # Logged once per outage, not once per request
+                print(f"❌ RATE LIMIT BACKEND FAILED, USING PER-WORKER LIMITS: {str(e)}")
+                self.backend_down = True
+            return await self.fallback_backend.take(key, cost, RATE_LIMIT_BURST, RATE_LIMIT_PER_SECOND)
+        if self.backend_down:
+            print("✅ RATE LIMIT BACKEND RECOVERED")
+            self.backend_down = False
+        return result
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        route = (scope["method"], scope["path"].rstrip("/") or "/")
+        heavy = route in HEAVY_ROUTES
+
+        # Shed before spending tokens: the client did nothing wrong
+        usage = self.pool_usage(scope["method"])
+        if usage is not None and (usage >= 1 or (heavy and usage >= HEAVY_ROUTE_POOL_RATIO)):
+            await _reject(503, "Server busy, please retry", 1)(scope, receive, send)
+            return
+
+        allowed, retry_after = await self.take(client_key(scope), ROUTE_COSTS.get(route, 1))
+        if not allowed:
+            await _reject(429, "Too many requests", retry_after)(scope, receive, send)
+            return
+
+        if not heavy:
+            await self.app(scope, receive, send)
+            return
+
+        # Heavy routes never queue: if every slot is busy, fail fast
+        if self.heavy_slots.locked():
+            await _reject(503, "Server busy, please retry", 1)(scope, receive, send)
+            return
+        async with self.heavy_slots:
+            await self.app(scope, receive, send)
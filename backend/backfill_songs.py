@@ -0,0 +1,78 @@
+"""
+Backfill the song catalog from legacy playlist JSON songs
+
+Copies every song stored inline in playlists.songs into the deduplicated
+songs catalog and replaces it with a playlist_songs reference. Safe to
+re-run: playlists that were already moved are skipped. Playlists with a
+song that has no URL are left untouched and reported.
+
+Usage: python backfill_songs.py [--batch-size 200] [--dry-run]
+"""
+import argparse
+
+from database import SessionLocal
+import models
+import catalog
+
+
+def backfill(batch_size: int = 200, dry_run: bool = False):
+    db = SessionLocal()
+    last_id = 0
+    playlists_moved = 0
+    songs_moved = 0
+    skipped = []
+
+    try:
+        while True:
+            # Keyset pagination so each batch is a short, bounded transaction; the rows
+            # are locked so a concurrent song edit can't hand out the same entry IDs
+            batch = db.query(models.Playlist).filter(
+                models.Playlist.id > last_id
+            ).order_by(models.Playlist.id.asc()).limit(batch_size).with_for_update().all()
+
+            if not batch:
+                break
+
+            for playlist in batch:
+                try:
+                    moved = catalog.migrate_legacy_songs(db, playlist)
+                except catalog.UnmigratableSongsError as e:
+                    # Left as JSON so nothing is lost; fix the songs and re-run
+                    skipped.append(playlist.id)
+                    print(f"❌ SKIPPED: {str(e)}")
+                    continue
+                if moved:
+                    playlists_moved += 1
+                    songs_moved += moved
+
+            last_id = batch[-1].id
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+            db.expunge_all()
+
+            print(f"📝 Processed playlists up to ID {last_id}: {songs_moved} songs from {playlists_moved} playlists")
+    finally:
+        db.close()
+
+    catalog_size = None
+    if not dry_run:
+        db = SessionLocal()
+        try:
+            catalog_size = db.query(models.Song).count()
+        finally:
+            db.close()
+
+    print(f"✅ BACKFILL {'DRY RUN ' if dry_run else ''}DONE: {songs_moved} songs from {playlists_moved} playlists"
+          + (f", {catalog_size} unique songs in catalog" if catalog_size is not None else ""))
+    if skipped:
+        print(f"❌ {len(skipped)} playlists left as JSON (songs without a URL): {skipped}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move legacy playlist JSON songs into the song catalog")
+    parser.add_argument("--batch-size", type=int, default=200, help="Playlists per transaction (default 200)")
+    parser.add_argument("--dry-run", action="store_true", help="Roll back every batch instead of committing")
+    args = parser.parse_args()
+    backfill(batch_size=args.batch_size, dry_run=args.dry_run)
@@ -0,0 +1,135 @@
+"""
+Response serialization and compression benchmark
+
+Seeds a throwaway SQLite database with users (base64 avatars) and
+playlists (songs arrays, base64 covers), then reports for /users and
+/playlists/recent:
+  - request time through the app: stock FastAPI routes (jsonable_encoder +
+    stdlib json) vs FastJSONRoute, and whether jsonable_encoder still runs
+  - bytes on the wire: identity vs gzip vs brotli
+
+Usage: python bench_responses.py [--users 200] [--playlists 50] [--songs 40] [--iterations 50]
+"""
+import argparse
+import base64
+import json
+import os
+import statistics
+import tempfile
+import time
+
+BENCH_DB = os.path.join(tempfile.mkdtemp(prefix="playalong-bench-"), "bench.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+# Timing loops would otherwise trip the per-client rate limit
+os.environ["RATE_LIMIT_BURST"] = "1000000000"
+
+import database  # noqa: E402  (DATABASE_URL must be set first)
+database.engine.echo = False
+
+import fastapi.routing  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.routing import APIRoute  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from starlette.middleware.sessions import SessionMiddleware  # noqa: E402
+
+import main  # noqa: E402
+import migrate  # noqa: E402
+import models  # noqa: E402
+
+
+def fake_image(size):
+    return "data:image/png;base64," + base64.b64encode(os.urandom(size // 2) + bytes(size // 2)).decode()
+
+
+def seed(users, playlists, songs):
+    migrate.migrate()
+    db = database.SessionLocal()
+    try:
+        owners = [models.User(username=f"user{i}", hashed_password="x", email=f"user{i}@example.com",
+                              avatar=fake_image(8000)) for i in range(users)]
+        db.add_all(owners)
+        db.flush()
+        for i in range(playlists):
+            playlist = models.Playlist(name=f"Playlist {i}", description="Benchmark playlist",
+                                       image=fake_image(30000), user_id=owners[i % users].id, songs=[])
+            db.add(playlist)
+            for j in range(songs):
+                playlist.entries.append(models.PlaylistSong(
+                    song=models.Song(url_hash=f"{i}-{j}", url=f"https://youtube.com/watch?v={i}-{j}",
+                                     title=f"Song {j}", artist=f"Artist {j % 7}", album="Album", duration="3:45"),
+                    entry_id=j + 1, position=j))
+        db.commit()
+    finally:
+        db.close()
+
+
+def stock_app():
+    """
+    The same endpoints on plain APIRoutes, i.e. FastAPI's default serialization
+    """
+    app = FastAPI()
+    for route in main.app.routes:
+        if isinstance(route, APIRoute):
+            app.router.add_api_route(
+                route.path, getattr(route.endpoint, "__wrapped__", route.endpoint),
+                methods=list(route.methods), route_class_override=APIRoute
+            )
+    app.add_middleware(SessionMiddleware, secret_key="bench", https_only=True)
+    return app
+
+
+def time_requests(client, path, iterations):
+    """
+    Median request time in ms, plus how many times FastAPI's jsonable_encoder ran per request
+    """
+    calls = 0
+    original = fastapi.routing.jsonable_encoder
+
+    def counting_encoder(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return original(*args, **kwargs)
+
+    samples = []
+    fastapi.routing.jsonable_encoder = counting_encoder
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = client.get(path, headers={"Accept-Encoding": "identity"})
+            samples.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+    finally:
+        fastapi.routing.jsonable_encoder = original
+    return statistics.median(samples) * 1000, calls / iterations
+
+
+def wire_bytes(client, path, encoding):
+    response = client.get(path, headers={"Accept-Encoding": encoding})
+    return int(response.headers["content-length"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure JSON serialization time and response size")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--playlists", type=int, default=50)
+    parser.add_argument("--songs", type=int, default=40, help="Songs per playlist")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    seed(args.users, args.playlists, args.songs)
+
+    with TestClient(main.app, base_url="https://testserver") as client, \
+            TestClient(stock_app(), base_url="https://testserver") as stock_client:
+        for path in ("/users", f"/playlists/recent?limit={args.playlists}"):
+            stock_ms, stock_calls = time_requests(stock_client, path, args.iterations)
+            fast_ms, fast_calls = time_requests(client, path, args.iterations)
+            same_body = json.loads(stock_client.get(path).content) == json.loads(client.get(path).content)
+
+            print(f"{path}")
+            print(f"  request    stock FastAPI: {stock_ms:8.2f} ms   FastJSONRoute: {fast_ms:8.2f} ms   "
+                  f"({stock_ms / fast_ms:.1f}x)")
+            print(f"  jsonable_encoder calls/request  stock: {stock_calls:.0f}   FastJSONRoute: {fast_calls:.0f}   "
+                  f"{'✅' if fast_calls == 0 else '❌'}   same body: {'✅' if same_body else '❌'}")
+            print(f"  wire bytes identity: {wire_bytes(client, path, 'identity'):>10}   "
+                  f"gzip: {wire_bytes(client, path, 'gzip'):>10}   br: {wire_bytes(client, path, 'br'):>10}")
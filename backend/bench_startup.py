@@ -0,0 +1,87 @@
+"""
+Worker startup benchmark
+
+Boots uvicorn against the configured DATABASE_URL and measures the time
+until the first request is answered, then measures what the old
+create_all-on-startup hook added to every worker boot.
+
+Usage: python bench_startup.py [--runs 5] [--workers 2]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CREATE_ALL_SNIPPET = """
+import time
+import database
+database.engine.echo = False
+import models
+start = time.perf_counter()
+models.Base.metadata.create_all(bind=database.engine)
+print(time.perf_counter() - start)
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_response(workers, timeout=30.0):
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/users/me", timeout=1)
+            except urllib.error.HTTPError:
+                # 401 means the app is up and routing requests
+                return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.02)
+        raise RuntimeError("uvicorn did not answer within the timeout")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def create_all_cost():
+    output = subprocess.run(
+        [sys.executable, "-c", CREATE_ALL_SNIPPET],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def summarize(label, samples):
+    print(f"{label}: median {statistics.median(samples) * 1000:.1f} ms, "
+          f"min {min(samples) * 1000:.1f} ms, max {max(samples) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure API worker cold start time")
+    parser.add_argument("--runs", type=int, default=5, help="Number of boots to time (default 5)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")), help="uvicorn workers")
+    args = parser.parse_args()
+
+    boots = [time_to_first_response(args.workers) for _ in range(args.runs)]
+    summarize(f"Cold start to first response ({args.workers} workers)", boots)
+
+    create_all = [create_all_cost() for _ in range(args.runs)]
+    summarize("create_all per worker (removed from startup)", create_all)
+    print(f"📝 Old startup paid create_all {args.workers}x per deploy; migrations now run once via migrate.py")
@@ -0,0 +1,188 @@
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from sqlalchemy import case, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+
+# Query parameters that never change which track a link points to
+TRACKING_PARAMS = {"si", "feature", "fbclid", "gclid", "ref", "context", "pp"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a song URL so the same track always maps to the same catalog row
+    """
+    url = url.strip()
+    parts = urlsplit(url)
+    scheme = (parts.scheme or "https").lower()
+    if scheme == "http":
+        scheme = "https"
+    host = parts.netloc.lower()
+    for prefix in ("www.", "m.", "music."):
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix):]
+    path = parts.path.rstrip("/")
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    ]
+
+    # youtu.be/<id> and youtube.com/watch?v=<id> are the same video
+    if host == "youtu.be" and path:
+        query = [("v", path.lstrip("/"))] + [(k, v) for k, v in query if k == "t"]
+        host, path = "youtube.com", "/watch"
+
+    query.sort()
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def parse_duration(value) -> int | None:
+    """
+    Seconds in a "3:45" / "1:02:03" / "225" duration, or None if it can't be read
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value) if value >= 0 else None
+    parts = str(value).strip().split(":")
+    if len(parts) > 3 or not all(part.strip().isdigit() for part in parts):
+        return None
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def format_duration(seconds: int) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def url_hash(url: str) -> str:
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+def song_metadata(song_data: dict) -> dict:
+    """
+    Display metadata for a song, with the duration normalized at write time
+    so nobody has to parse it on read
+    """
+    duration = song_data.get("duration")
+    duration_seconds = parse_duration(duration)
+    if duration_seconds is not None:
+        duration = format_duration(duration_seconds)
+
+    return {
+        "title": song_data["title"],
+        "artist": song_data["artist"],
+        "album": song_data.get("album"),
+        "duration": duration,
+        "duration_seconds": duration_seconds
+    }
+
+
+def get_or_create_song(db: Session, song_data: dict) -> models.Song:
+    """
+    Return the catalog row for a song's URL, creating it on first sight
+    Only the URL identity is shared; each playlist entry keeps its own metadata.
+    """
+    key = url_hash(song_data["url"])
+    song = db.query(models.Song).filter(models.Song.url_hash == key).first()
+    if song:
+        return song
+
+    song = models.Song(url_hash=key, url=song_data["url"], **song_metadata(song_data))
+    try:
+        # Savepoint so a concurrent insert of the same URL doesn't poison the outer transaction
+        with db.begin_nested():
+            db.add(song)
+    except IntegrityError:
+        # Locking read: a plain SELECT on MySQL (REPEATABLE READ) would still see the
+        # transaction's old snapshot, without the row the other transaction just inserted
+        song = db.query(models.Song).filter(models.Song.url_hash == key).with_for_update().one()
+    return song
+
+
+def refresh_aggregates(db: Session, playlist: models.Playlist):
+    """
+    Recompute a playlist's song_count and total_duration_seconds from its entries
+    in one UPDATE, so edits from other workers are never overwritten (does not commit)
+    """
+    db.flush()
+    in_playlist = models.PlaylistSong.playlist_id == playlist.id
+    # Entries with their own metadata (see PlaylistSong.has_own_metadata) use their own duration
+    duration = case(
+        (models.PlaylistSong.title.isnot(None), models.PlaylistSong.duration_seconds),
+        else_=models.Song.duration_seconds
+    )
+    db.query(models.Playlist).filter(models.Playlist.id == playlist.id).update({
+        models.Playlist.song_count: select(func.count(models.PlaylistSong.id)).where(in_playlist).scalar_subquery(),
+        models.Playlist.total_duration_seconds: select(func.coalesce(func.sum(duration), 0)).select_from(
+            models.PlaylistSong
+        ).join(models.Song, models.Song.id == models.PlaylistSong.song_id).where(in_playlist).scalar_subquery(),
+    }, synchronize_session=False)
+    db.expire(playlist, ["song_count", "total_duration_seconds"])
+
+
+def add_entry(db: Session, playlist: models.Playlist, song_data: dict, entry_id: int) -> models.PlaylistSong:
+    """
+    Append a catalog reference to the end of a playlist
+    Call refresh_aggregates before committing.
+    """
+    entry = models.PlaylistSong(
+        song=get_or_create_song(db, song_data),
+        entry_id=entry_id,
+        position=max((e.position for e in playlist.entries), default=-1) + 1,
+        **song_metadata(song_data)
+    )
+    playlist.entries.append(entry)
+    return entry
+
+
+def remove_entries(playlist: models.Playlist, entries: list):
+    """
+    Drop entries from a playlist (the catalog rows stay for other playlists)
+    Call refresh_aggregates before committing.
+    """
+    for entry in entries:
+        playlist.entries.remove(entry)
+    # Close the gaps so positions stay unique and contiguous
+    for position, entry in enumerate(playlist.entries):
+        entry.position = position
+
+
+class UnmigratableSongsError(ValueError):
+    """
+    Raised when legacy JSON songs can't be moved into the catalog without losing any
+    """
+
+
+def migrate_legacy_songs(db: Session, playlist: models.Playlist) -> int:
+    """
+    Move a playlist's legacy JSON songs into catalog entries (does not commit)
+    Returns the number of songs moved
+    Raises UnmigratableSongsError, leaving the JSON untouched, if any song has no URL
+    """
+    legacy_songs = playlist.songs if playlist.songs else []
+    if not legacy_songs or playlist.entries:
+        return 0
+
+    # Every URL-less song would hash to the same catalog row, so refuse rather than drop them
+    missing_url = [song_data for song_data in legacy_songs if not str(song_data.get("url") or "").strip()]
+    if missing_url:
+        raise UnmigratableSongsError(
+            f"Playlist {playlist.id} has {len(missing_url)} song(s) without a URL"
+        )
+
+    for index, song_data in enumerate(legacy_songs):
+        add_entry(db, playlist, song_data, song_data.get("id") or index + 1)
+
+    playlist.songs = []
+    refresh_aggregates(db, playlist)
+    return len(legacy_songs)
@@ -0,0 +1,88 @@
+from datetime import timedelta
+import os
+
+from sqlalchemy.sql import func
+
+from database import SessionLocal
+import models
+
+# Rows deleted per transaction, so no single purge step holds locks for long
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "500"))
+
+# The sweep leaves fresh tombstones alone so it never races the request's own background purge
+PURGE_GRACE_SECONDS = int(os.getenv("PURGE_GRACE_SECONDS", "3600"))
+
+
+def _delete_in_batches(db, model, condition, batch_size):
+    """
+    Delete matching rows a batch at a time, committing after each batch
+    """
+    deleted = 0
+    while True:
+        ids = [row.id for row in db.query(model.id).filter(condition).limit(batch_size)]
+        if not ids:
+            return deleted
+        db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        deleted += len(ids)
+
+
+def purge_user(user_id, batch_size=PURGE_BATCH_SIZE):
+    """
+    Purge a tombstoned account and everything that hangs off it
+    Safe to re-run: it resumes wherever an earlier run stopped.
+    """
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+        if not user or user.deleted_at is None:
+            return
+
+        # Likes the user gave to other playlists
+        _delete_in_batches(db, models.PlaylistLike, models.PlaylistLike.user_id == user_id, batch_size)
+
+        # The user's playlists, emptied a batch at a time before the playlist rows go
+        while True:
+            playlist_ids = [
+                row.id for row in db.query(models.Playlist.id)
+                .filter(models.Playlist.user_id == user_id)
+                .limit(batch_size)
+            ]
+            if not playlist_ids:
+                break
+            _delete_in_batches(db, models.PlaylistLike, models.PlaylistLike.playlist_id.in_(playlist_ids), batch_size)
+            _delete_in_batches(db, models.PlaylistSong, models.PlaylistSong.playlist_id.in_(playlist_ids), batch_size)
+            db.query(models.Playlist).filter(models.Playlist.id.in_(playlist_ids)).delete(synchronize_session=False)
+            db.commit()
+
+        # Nothing is left for the database cascade to do
+        db.query(models.User).filter(models.User.id == user_id).delete(synchronize_session=False)
+        db.commit()
+        print(f"✅ USER PURGED: ID {user_id}")
+    except Exception as e:
+        db.rollback()
+        # The tombstone stays, so purge_deleted.py will retry this account
+        print(f"❌ ERROR PURGING USER {user_id}: {str(e)}")
+    finally:
+        db.close()
+
+
+def purge_tombstoned_users(batch_size=PURGE_BATCH_SIZE, grace_seconds=PURGE_GRACE_SECONDS):
+    """
+    Purge accounts tombstoned more than grace_seconds ago (sweeps up purges interrupted by a restart)
+    """
+    db = SessionLocal()
+    try:
+        # Compare against the database clock, which is what set deleted_at
+        cutoff = db.query(func.now()).scalar() - timedelta(seconds=grace_seconds)
+        user_ids = [
+            row.id for row in db.query(models.User.id).filter(
+                models.User.deleted_at.isnot(None), models.User.deleted_at < cutoff
+            )
+        ]
+    finally:
+        db.close()
+
+    for user_id in user_ids:
+        purge_user(user_id, batch_size)
+    return len(user_ids)
@@ -0,0 +1,154 @@
+import asyncio
+import os
+
+import orjson
+
+# Optional broker so events reach subscribers on every worker, e.g. redis://localhost:6379/0
+EVENTS_BROKER_URL = os.getenv("EVENTS_BROKER_URL", "")
+
+# Events buffered per subscriber before a slow client is told to resync
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_SECONDS = 15
+
+# Seconds before a failed broker listener reconnects
+LISTENER_RETRY_SECONDS = 1
+
+CHANNEL_PREFIX = "playlist-events:"
+
+
+class LocalEventBroker:
+    """
+    In-process pub/sub: one bounded queue per connected client
+    """
+    def __init__(self):
+        self.subscribers = {}
+
+    def subscribe(self, playlist_id) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.setdefault(playlist_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, playlist_id, queue):
+        queues = self.subscribers.get(playlist_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[playlist_id]
+
+    async def publish(self, playlist_id, event: dict):
+        self.deliver(playlist_id, event)
+
+    def deliver(self, playlist_id, event: dict):
+        for queue in list(self.subscribers.get(playlist_id, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # The client fell behind; drop its backlog and have it refetch once
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync"})
+
+    def resync_all(self):
+        # Every client may have missed events: have them all refetch once
+        for playlist_id in list(self.subscribers):
+            self.deliver(playlist_id, {"type": "resync"})
+
+
+class RedisEventBroker(LocalEventBroker):
+    """
+    Cross-worker pub/sub through Redis; each worker relays to its own subscribers
+    Any server speaking the Redis protocol works as a local stand-in.
+    """
+    def __init__(self, url):
+        import redis.asyncio  # Only needed when a shared broker is configured
+
+        super().__init__()
+        self.client = redis.asyncio.from_url(url)
+        self.listener = None
+
+    def subscribe(self, playlist_id) -> asyncio.Queue:
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.create_task(self._listen())
+        return super().subscribe(playlist_id)
+
+    async def publish(self, playlist_id, event: dict):
+        await self.client.publish(f"{CHANNEL_PREFIX}{playlist_id}", orjson.dumps(event))
+
+    async def _listen(self):
+        """
+        Relay broker messages to this worker's subscribers, reconnecting on failure
+        """
+        reconnecting = False
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                if reconnecting:
+                    # Whatever was published while we weren't subscribed is gone
+                    self.resync_all()
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    channel = message["channel"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    playlist_id = int(channel[len(CHANNEL_PREFIX):])
+                    self.deliver(playlist_id, orjson.loads(message["data"]))
+            except Exception as e:
+                print(f"❌ EVENT BROKER LISTENER FAILED, RECONNECTING: {str(e)}")
+            finally:
+                await pubsub.aclose()
+            reconnecting = True
+            await asyncio.sleep(LISTENER_RETRY_SECONDS)
+
+
+def make_event_broker(url=EVENTS_BROKER_URL):
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisEventBroker(url)
+    if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        # Each worker would only see its own publishes; viewers on other workers miss them
+        print("❌ EVENTS_BROKER_URL is not set but WEB_CONCURRENCY > 1: "
+              "live playlist events will not reach clients connected to other workers")
+    return LocalEventBroker()
+
+
+broker = make_event_broker()
+
+
+async def publish(playlist_id, event_type, **data):
+    """
+    Best-effort notification, called after the change is committed: a broker
+    outage must not turn a write that succeeded into an error for the client
+    """
+    try:
+        await broker.publish(playlist_id, {"type": event_type, "playlist_id": playlist_id, **data})
+    except Exception as e:
+        print(f"❌ ERROR PUBLISHING {event_type} FOR PLAYLIST {playlist_id}: {str(e)}")
+
+
+def format_sse(event: dict) -> bytes:
+    return b"event: " + event["type"].encode() + b"\ndata: " + orjson.dumps(event) + b"\n\n"
+
+
+async def stream(request, playlist_id):
+    """
+    Yield Server-Sent Events for one playlist until the client disconnects
+    """
+    queue = broker.subscribe(playlist_id)
+    try:
+        # Tell the client how long to wait before reconnecting
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield b": keep-alive\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        broker.unsubscribe(playlist_id, queue)
@@ -1,15 +1,21 @@
-from fastapi import FastAPI, Request, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, Request, Depends, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, field_validator
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, defer
 from dotenv import load_dotenv
 import os
 
 # Import database and models
-from database import engine, get_db
+from database import get_db, get_read_db
+from responses import FastJSONResponse, FastJSONRoute, CompressionMiddleware
+from admission import AdmissionControlMiddleware
 import models
+import catalog
+import events
+import deletion
 
 # Load environment variables
 load_dotenv()
@@ -27,8 +33,15 @@ app = FastAPI(
     openapi_url="/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
 )
 
+# Dict results go straight to orjson instead of through jsonable_encoder
+app.router.route_class = FastJSONRoute
+
+# Rate limits and load shedding; added first so it runs inside CORS and sessions
+app.add_middleware(AdmissionControlMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -48,12 +61,12 @@ app.add_middleware(
     https_only=True  # Required when using SameSite=None
 )
 
+# Compress large payloads (songs arrays, base64 images) with brotli or gzip
+app.add_middleware(CompressionMiddleware)
 
-# Create database tables on startup
-@app.on_event("startup")
-def startup_event():
-    models.Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully!")
+
+# Schema changes are applied once per deploy by `python migrate.py`,
+# not by every worker on boot
 
 
 # --- Pydantic Models (The "Data Structure") ---
@@ -69,6 +82,15 @@ class Song(BaseModel):
     album: str | None = None
     url: str  # Link to the song (YouTube, Spotify, etc.) - REQUIRED
 
+    @field_validator("url")
+    @classmethod
+    def url_not_blank(cls, url):
+        # Blank URLs would all share one catalog row
+        url = url.strip()
+        if not url:
+            raise ValueError("url must not be empty")
+        return url
+
 class PlaylistCreate(BaseModel):
     name: str
     image: str | None = None
@@ -85,6 +107,71 @@ class UserUpdate(BaseModel):
     avatar: str | None = None
 
 
+# Most IDs/names accepted by one batch request
+MAX_BATCH_SIZE = 200
+
+
+def parse_batch_param(raw: str, cast=str):
+    """
+    Split a comma-separated batch parameter, dropping duplicates but keeping order
+    """
+    values = []
+    seen = set()
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            value = cast(item)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid value in batch: {item}")
+        if value not in seen:
+            seen.add(value)
+            values.append(value)
+    
+    if len(values) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} values per batch")
+    return values
+
+
+def get_session_user(request: Request, db: Session):
+    """
+    Return the logged-in user for a write, or raise 401
+    Tombstoned accounts are rejected, since other sessions of a deleted account stay signed in
+    """
+    session_username = request.session.get("username")
+    if not session_username:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    user = db.query(models.User).filter(
+        models.User.username == session_username, models.User.deleted_at.is_(None)
+    ).first()
+    if not user:
+        request.session.clear()
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return user
+
+
+def lock_playlist(db: Session, playlist_id: int):
+    """
+    Fetch a playlist with its row locked until commit, so concurrent song
+    edits (entry IDs, positions) on it run one at a time
+    Call it before any other query: InnoDB takes the REPEATABLE READ snapshot at
+    the first plain SELECT, which would then miss entries the other writer added.
+    """
+    return db.query(models.Playlist).filter(models.Playlist.id == playlist_id).with_for_update().first()
+
+
+def migrate_legacy_songs(db: Session, playlist):
+    """
+    Move a playlist's legacy JSON songs into the catalog before editing it
+    """
+    try:
+        catalog.migrate_legacy_songs(db, playlist)
+    except catalog.UnmigratableSongsError as e:
+        raise HTTPException(status_code=409, detail=f"{str(e)}; it can't be edited until they are fixed")
+
+
 # ============================================
 # AUTHENTICATION ROUTES
 # ============================================
@@ -95,7 +182,9 @@ async def login(request: Request, user_login: UserLogin, db: Session = Depends(g
     Login - Check credentials and create session
     """
     # Find user by username
-    user = db.query(models.User).filter(models.User.username == user_login.username).first()
+    user = db.query(models.User).filter(
+        models.User.username == user_login.username, models.User.deleted_at.is_(None)
+    ).first()
     
     # Check if user exists and password is correct (prototype check)
     if not user or user.hashed_password != user_login.password:
@@ -189,24 +278,47 @@ async def get_current_user(request: Request):
 # ============================================
 
 @app.get("/users")
-async def get_all_users(db: Session = Depends(get_db)):
+async def get_all_users(names: str | None = None, db: Session = Depends(get_read_db)):
     """
     Get all users (for admin/social features) - sorted by signup order
-    """
-    users = db.query(models.User).order_by(models.User.id.asc()).all()
-    users_list = [user.to_dict() for user in users]
-    return {"users": users_list}
+    names: optional comma-separated usernames to fetch in one batch, returned in that order
+    """
+    if names is None:
+        users = db.query(models.User).filter(models.User.deleted_at.is_(None)).order_by(models.User.id.asc()).all()
+        users_list = [user.to_dict() for user in users]
+        return {"users": users_list}
+    
+    usernames = parse_batch_param(names)
+    if not usernames:
+        return {"users": [], "missing": []}
+    
+    # One IN query for the users, one grouped count for their playlists
+    users = db.query(models.User).filter(models.User.username.in_(usernames), models.User.deleted_at.is_(None)).all()
+    users_by_name = {user.username: user for user in users}
+    playlist_counts = dict(
+        db.query(models.Playlist.user_id, func.count(models.Playlist.id))
+        .filter(models.Playlist.user_id.in_([user.id for user in users]))
+        .group_by(models.Playlist.user_id)
+        .all()
+    ) if users else {}
+    
+    users_list = [
+        users_by_name[name].to_dict(playlist_count=playlist_counts.get(users_by_name[name].id, 0))
+        for name in usernames if name in users_by_name
+    ]
+    missing = [name for name in usernames if name not in users_by_name]
+    return {"users": users_list, "missing": missing}
 
 
 # IMPORTANT: Specific routes must come BEFORE parameterized routes
 @app.get("/users/recent")
-async def get_recent_users(limit: int = 6, db: Session = Depends(get_db)):
+async def get_recent_users(limit: int = 6, db: Session = Depends(get_read_db)):
     """
     Get recently registered users
     limit: maximum number of results (default 6)
     """
     # Get users ordered by ID descending (newest first)
-    users = db.query(models.User).order_by(models.User.id.desc()).limit(limit).all()
+    users = db.query(models.User).filter(models.User.deleted_at.is_(None)).order_by(models.User.id.desc()).limit(limit).all()
     
     # Return users with their data
     results = [user.to_dict() for user in users]
@@ -214,11 +326,11 @@ async def get_recent_users(limit: int = 6, db: Session = Depends(get_db)):
 
 
 @app.get("/users/{username}")
-async def get_user_profile(username: str, db: Session = Depends(get_db)):
+async def get_user_profile(username: str, db: Session = Depends(get_read_db)):
     """
     Get a specific user's profile
     """
-    user = db.query(models.User).filter(models.User.username == username).first()
+    user = db.query(models.User).filter(models.User.username == username, models.User.deleted_at.is_(None)).first()
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -231,18 +343,15 @@ async def update_user_profile(username: str, user_update: UserUpdate, request: R
     """
     Update a user's profile (authentication required)
     """
-    # Check if user is authenticated
-    session_username = request.session.get("username")
-    if not session_username:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+    # Check if user is authenticated (and the account hasn't been deleted)
+    session_user = get_session_user(request, db)
+    session_username = session_user.username
     
     # Check if user is updating their own profile
     if session_username != username:
         raise HTTPException(status_code=403, detail="Cannot update another user's profile")
     
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = session_user
     
     # Update fields
     if user_update.email is not None:
@@ -259,26 +368,24 @@ async def update_user_profile(username: str, user_update: UserUpdate, request: R
 
 
 @app.delete("/users/{username}")
-async def delete_user_account(username: str, request: Request, db: Session = Depends(get_db)):
+async def delete_user_account(username: str, request: Request, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """
     Delete a user's account (authentication required)
     """
-    # Check if user is authenticated
-    session_username = request.session.get("username")
-    if not session_username:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+    # Check if user is authenticated (and the account hasn't been deleted)
+    session_user = get_session_user(request, db)
+    session_username = session_user.username
     
     # Check if user is deleting their own account
     if session_username != username:
         raise HTTPException(status_code=403, detail="Cannot delete another user's account")
     
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = session_user
     
-    # Delete user (playlists will be deleted automatically due to cascade)
-    db.delete(user)
+    # Tombstone now; playlists and likes are purged in small batches after the response
+    user.deleted_at = func.now()
     db.commit()
+    background_tasks.add_task(deletion.purge_user, user.id)
     
     # Clear session
     request.session.clear()
@@ -291,7 +398,7 @@ async def delete_user_account(username: str, request: Request, db: Session = Dep
 # ============================================
 
 @app.get("/users/{username}/playlists")
-async def get_user_playlists(username: str, request: Request, db: Session = Depends(get_db)):
+async def get_user_playlists(username: str, request: Request, db: Session = Depends(get_read_db)):
     """
     Get all playlists for a specific user
     """
@@ -303,14 +410,14 @@ async def get_user_playlists(username: str, request: Request, db: Session = Depe
         if current_user:
             current_user_id = current_user.id
     
-    user = db.query(models.User).filter(models.User.username == username).first()
+    user = db.query(models.User).filter(models.User.username == username, models.User.deleted_at.is_(None)).first()
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     playlists = []
     for playlist in user.playlists:
-        playlist_dict = playlist.to_dict()
+        playlist_dict = playlist.to_dict(include_songs=False)
         playlist_dict["likes_count"] = len(playlist.likes)
         
         # Check if current user has liked this playlist
@@ -331,18 +438,15 @@ async def create_playlist(username: str, playlist_data: PlaylistCreate, request:
     Create a new playlist for a user (authentication required)
     """
     try:
-        # Check if user is authenticated
-        session_username = request.session.get("username")
-        if not session_username:
-            raise HTTPException(status_code=401, detail="Not authenticated")
+        # Check if user is authenticated (and the account hasn't been deleted)
+        session_user = get_session_user(request, db)
+        session_username = session_user.username
         
         # Check if user is creating playlist for themselves
         if session_username != username:
             raise HTTPException(status_code=403, detail="Cannot create playlist for another user")
         
-        user = db.query(models.User).filter(models.User.username == username).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        user = session_user
         
         # Create new playlist
         new_playlist = models.Playlist(
@@ -369,9 +473,61 @@ async def create_playlist(username: str, playlist_data: PlaylistCreate, request:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
+@app.get("/playlists")
+async def get_playlists_batch(ids: str, request: Request, db: Session = Depends(get_read_db)):
+    """
+    Get several playlists in one request
+    ids: comma-separated playlist IDs; results keep the requested order
+    """
+    playlist_ids = parse_batch_param(ids, int)
+    if not playlist_ids:
+        return {"playlists": [], "missing": []}
+    
+    # The session already carries the user ID, so no user lookup is needed
+    current_user_id = request.session.get("user_id")
+    
+    # One query per table regardless of how many IDs were requested
+    playlists = db.query(models.Playlist).filter(models.Playlist.id.in_(playlist_ids)).all()
+    owner_ids = {playlist.user_id for playlist in playlists}
+    owners = dict(
+        db.query(models.User.id, models.User.username).filter(models.User.id.in_(owner_ids), models.User.deleted_at.is_(None)).all()
+    ) if owner_ids else {}
+    # Playlists of accounts awaiting purge are treated as missing
+    playlists = [playlist for playlist in playlists if playlist.user_id in owners]
+    likes_counts = dict(
+        db.query(models.PlaylistLike.playlist_id, func.count(models.PlaylistLike.id))
+        .filter(models.PlaylistLike.playlist_id.in_(playlist_ids))
+        .group_by(models.PlaylistLike.playlist_id)
+        .all()
+    )
+    liked_ids = set()
+    if current_user_id:
+        liked_ids = {
+            row.playlist_id for row in db.query(models.PlaylistLike.playlist_id).filter(
+                models.PlaylistLike.user_id == current_user_id,
+                models.PlaylistLike.playlist_id.in_(playlist_ids)
+            )
+        }
+    
+    playlists_by_id = {playlist.id: playlist for playlist in playlists}
+    results = []
+    for playlist_id in playlist_ids:
+        playlist = playlists_by_id.get(playlist_id)
+        if not playlist:
+            continue
+        playlist_dict = playlist.to_dict(include_songs=False)
+        playlist_dict["owner"] = owners.get(playlist.user_id)
+        playlist_dict["likes_count"] = likes_counts.get(playlist_id, 0)
+        playlist_dict["is_liked"] = playlist_id in liked_ids
+        results.append(playlist_dict)
+    
+    missing = [playlist_id for playlist_id in playlist_ids if playlist_id not in playlists_by_id]
+    return {"playlists": results, "missing": missing}
+
+
 # IMPORTANT: Specific routes must come BEFORE parameterized routes
 @app.get("/playlists/recent")
-async def get_recent_playlists(limit: int = 10, request: Request = None, db: Session = Depends(get_db)):
+async def get_recent_playlists(limit: int = 10, request: Request = None, db: Session = Depends(get_read_db)):
     """
     Get recently created playlists from all users
     limit: maximum number of results (default 10)
@@ -386,12 +542,14 @@ async def get_recent_playlists(limit: int = 10, request: Request = None, db: Ses
                 current_user_id = user.id
     
     # Get playlists ordered by ID descending (newest first)
-    playlists = db.query(models.Playlist).order_by(models.Playlist.id.desc()).limit(limit).all()
+    playlists = db.query(models.Playlist).join(models.Playlist.owner).filter(
+        models.User.deleted_at.is_(None)
+    ).order_by(models.Playlist.id.desc()).limit(limit).all()
     
     # Return playlists with owner info and likes
     results = []
     for playlist in playlists:
-        playlist_dict = playlist.to_dict()
+        playlist_dict = playlist.to_dict(include_songs=False)
         playlist_dict["owner"] = playlist.owner.username
         playlist_dict["likes_count"] = len(playlist.likes)
         
@@ -408,7 +566,7 @@ async def get_recent_playlists(limit: int = 10, request: Request = None, db: Ses
 
 
 @app.get("/playlists/{playlist_id}")
-async def get_playlist(playlist_id: int, request: Request, db: Session = Depends(get_db)):
+async def get_playlist(playlist_id: int, request: Request, db: Session = Depends(get_read_db)):
     """
     Get a specific playlist by ID
     """
@@ -422,7 +580,7 @@ async def get_playlist(playlist_id: int, request: Request, db: Session = Depends
     
     playlist = db.query(models.Playlist).filter(models.Playlist.id == playlist_id).first()
     
-    if not playlist:
+    if not playlist or playlist.owner.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Playlist not found")
     
     playlist_dict = playlist.to_dict()
@@ -443,10 +601,9 @@ async def update_playlist(playlist_id: int, playlist_update: PlaylistUpdate, req
     """
     Update a playlist (name, image, description)
     """
-    # Check if user is authenticated
-    session_username = request.session.get("username")
-    if not session_username:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+    # Check if user is authenticated (and the account hasn't been deleted)
+    session_user = get_session_user(request, db)
+    session_username = session_user.username
     
     # Find the playlist
     playlist = db.query(models.Playlist).filter(models.Playlist.id == playlist_id).first()
@@ -477,10 +634,9 @@ async def delete_playlist(playlist_id: int, request: Request, db: Session = Depe
     """
     Delete a playlist
     """
-    # Check if user is authenticated
-    session_username = request.session.get("username")
-    if not session_username:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+    # Check if user is authenticated (and the account hasn't been deleted)
+    session_user = get_session_user(request, db)
+    session_username = session_user.username
     
     playlist = db.query(models.Playlist).filter(models.Playlist.id == playlist_id).first()
     
@@ -491,6 +647,7 @@ async def delete_playlist(playlist_id: int, request: Request, db: Session = Depe
     if playlist.owner.username != session_username:
         raise HTTPException(status_code=403, detail="You don't have permission to delete this playlist")
     
+    # Likes and song entries go with it via ON DELETE CASCADE, without being loaded
     db.delete(playlist)
     db.commit()
     
@@ -502,16 +659,17 @@ async def delete_playlist(playlist_id: int, request: Request, db: Session = Depe
 # ============================================
 
 @app.get("/playlists/{playlist_id}/songs")
-async def get_playlist_songs(playlist_id: int, db: Session = Depends(get_db)):
+async def get_playlist_songs(playlist_id: int, db: Session = Depends(get_read_db)):
     """
     Get all songs in a playlist
     """
     playlist = db.query(models.Playlist).filter(models.Playlist.id == playlist_id).first()
     
-    if not playlist:
+    # Playlists of accounts awaiting purge are hidden
+    if not playlist or playlist.owner.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Playlist not found")
     
-    return {"songs": playlist.songs if playlist.songs else []}
+    return {"songs": playlist.song_list()}
 
 
 @app.post("/playlists/{playlist_id}/songs")
@@ -519,12 +677,12 @@ async def add_song_to_playlist(playlist_id: int, song: Song, request: Request, d
     """
     Add a song to a playlist
     """
-    # Check if user is authenticated
-    session_username = request.session.get("username")
-    if not session_username:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+    # Lock the playlist first so concurrent song edits to it are serialized
+    playlist = lock_playlist(db, playlist_id)
     
-    playlist = db.query(models.Playlist).filter(models.Playlist.id == playlist_id).first()
+    # Check if user is authenticated (and the account hasn't been deleted)
+    session_user = get_session_user(request, db)
+    session_username = session_user.username
     
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
@@ -533,25 +691,22 @@ async def add_song_to_playlist(playlist_id: int, song: Song, request: Request, d
     if playlist.owner.username != session_username:
         raise HTTPException(status_code=403, detail="You don't have permission to modify this playlist")
     
-    # Get current songs or initialize empty list
-    songs = playlist.songs if playlist.songs else []
+    # Playlists created before the song catalog still keep their songs as JSON
+    migrate_legacy_songs(db, playlist)
     
     # Generate new song ID
-    new_song_id = max([s.get("id", 0) for s in songs], default=0) + 1
-    
-    # Add song
-    song_dict = song.model_dump()
-    song_dict["id"] = new_song_id
-    songs.append(song_dict)
+    new_song_id = max([entry.entry_id for entry in playlist.entries], default=0) + 1
     
-    # Update playlist
-    playlist.songs = songs
-    # IMPORTANT: Tell SQLAlchemy that the JSON column has been modified
-    flag_modified(playlist, "songs")
+    # Add a reference to the canonical catalog song
+    entry = catalog.add_entry(db, playlist, song.model_dump(), new_song_id)
+    catalog.refresh_aggregates(db, playlist)
     db.commit()
     db.refresh(playlist)
+    song_dict = entry.to_dict()
     
-    print(f"✅ SONG ADDED: '{song_dict['title']}' to playlist '{playlist.name}' (ID: {playlist.id}). Total songs: {len(playlist.songs)}")
+    print(f"✅ SONG ADDED: '{song_dict['title']}' to playlist '{playlist.name}' (ID: {playlist.id}). Total songs: {len(playlist.entries)}")
+    
+    await events.publish(playlist.id, "song_added", song=song_dict, position=entry.position)
     
     return {"message": "Song added successfully", "song": song_dict}
 
@@ -561,12 +716,12 @@ async def remove_song_from_playlist(playlist_id: int, song_id: int, request: Req
     """
     Remove a song from a playlist
     """
-    # Check if user is authenticated
-    session_username = request.session.get("username")
-    if not session_username:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+    # Lock the playlist first so concurrent song edits to it are serialized
+    playlist = lock_playlist(db, playlist_id)
     
-    playlist = db.query(models.Playlist).filter(models.Playlist.id == playlist_id).first()
+    # Check if user is authenticated (and the account hasn't been deleted)
+    session_user = get_session_user(request, db)
+    session_username = session_user.username
     
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
@@ -575,17 +730,20 @@ async def remove_song_from_playlist(playlist_id: int, song_id: int, request: Req
     if playlist.owner.username != session_username:
         raise HTTPException(status_code=403, detail="You don't have permission to modify this playlist")
     
-    # Remove song
-    songs = playlist.songs if playlist.songs else []
-    updated_songs = [s for s in songs if s.get("id") != song_id]
+    migrate_legacy_songs(db, playlist)
+    
+    # Remove song (the catalog row stays for other playlists)
+    entry = next((e for e in playlist.entries if e.entry_id == song_id), None)
     
-    if len(updated_songs) == len(songs):
+    if not entry:
         raise HTTPException(status_code=404, detail="Song not found in playlist")
     
-    playlist.songs = updated_songs
-    flag_modified(playlist, "songs")
+    catalog.remove_entries(playlist, [entry])
+    catalog.refresh_aggregates(db, playlist)
     db.commit()
     
+    await events.publish(playlist_id, "song_removed", song_id=song_id)
+    
     return {"message": "Song removed successfully"}
 
 
@@ -594,12 +752,12 @@ async def reorder_playlist_songs(playlist_id: int, song_ids: list[int], request:
     """
     Reorder songs in a playlist (provide list of song IDs in desired order)
     """
-    # Check if user is authenticated
-    session_username = request.session.get("username")
-    if not session_username:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+    # Lock the playlist first so concurrent song edits to it are serialized
+    playlist = lock_playlist(db, playlist_id)
     
-    playlist = db.query(models.Playlist).filter(models.Playlist.id == playlist_id).first()
+    # Check if user is authenticated (and the account hasn't been deleted)
+    session_user = get_session_user(request, db)
+    session_username = session_user.username
     
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
@@ -608,22 +766,80 @@ async def reorder_playlist_songs(playlist_id: int, song_ids: list[int], request:
     if playlist.owner.username != session_username:
         raise HTTPException(status_code=403, detail="You don't have permission to modify this playlist")
     
-    # Create a mapping of song_id to song object
-    songs = playlist.songs if playlist.songs else []
-    song_map = {song.get("id"): song for song in songs}
+    migrate_legacy_songs(db, playlist)
+    
+    # Create a mapping of song_id to playlist entry
+    entry_map = {entry.entry_id: entry for entry in playlist.entries}
     
     # Reorder based on provided IDs
-    reordered_songs = []
+    reordered_entries = []
     for song_id in song_ids:
-        if song_id in song_map:
-            reordered_songs.append(song_map[song_id])
-    
-    playlist.songs = reordered_songs
-    flag_modified(playlist, "songs")
+        if song_id in entry_map:
+            reordered_entries.append(entry_map.pop(song_id))
+    
+    # Entries left out of the new order are removed, as before
+    catalog.remove_entries(playlist, list(entry_map.values()))
+    playlist.entries = reordered_entries
+    for position, entry in enumerate(reordered_entries):
+        entry.position = position
+    catalog.refresh_aggregates(db, playlist)
     db.commit()
     db.refresh(playlist)
     
-    return {"message": "Songs reordered successfully", "songs": reordered_songs}
+    await events.publish(playlist_id, "songs_reordered", song_ids=[entry.entry_id for entry in reordered_entries])
+    
+    return {"message": "Songs reordered successfully", "songs": playlist.song_list()}
+
+
+@app.get("/songs/{song_id}/playlists")
+async def get_song_playlists(song_id: int, limit: int = 10, request: Request = None, db: Session = Depends(get_read_db)):
+    """
+    Get playlists that contain a catalog song, newest first
+    limit: maximum number of results (default 10)
+    """
+    song = db.query(models.Song).filter(models.Song.id == song_id).first()
+    
+    if not song:
+        raise HTTPException(status_code=404, detail="Song not found")
+    
+    # The session already carries the user ID, so no user lookup is needed
+    current_user_id = request.session.get("user_id")
+    
+    # Semi-join on the indexed playlist_songs.song_id column: no DISTINCT over
+    # the wide playlist rows, even when a playlist holds the song twice
+    containing = select(models.PlaylistSong.playlist_id).where(models.PlaylistSong.song_id == song_id)
+    rows = db.query(models.Playlist, models.User.username).options(
+        defer(models.Playlist.songs)  # Legacy JSON songs aren't part of a card
+    ).join(models.Playlist.owner).filter(
+        models.Playlist.id.in_(containing), models.User.deleted_at.is_(None)
+    ).order_by(models.Playlist.id.desc()).limit(min(limit, MAX_BATCH_SIZE)).all()
+    
+    # Likes for the whole page in one grouped query instead of one per playlist
+    playlist_ids = [playlist.id for playlist, _ in rows]
+    likes_counts = dict(
+        db.query(models.PlaylistLike.playlist_id, func.count(models.PlaylistLike.id))
+        .filter(models.PlaylistLike.playlist_id.in_(playlist_ids))
+        .group_by(models.PlaylistLike.playlist_id)
+        .all()
+    ) if playlist_ids else {}
+    liked_ids = set()
+    if current_user_id and playlist_ids:
+        liked_ids = {
+            row.playlist_id for row in db.query(models.PlaylistLike.playlist_id).filter(
+                models.PlaylistLike.user_id == current_user_id,
+                models.PlaylistLike.playlist_id.in_(playlist_ids)
+            )
+        }
+    
+    results = []
+    for playlist, owner_username in rows:
+        playlist_dict = playlist.to_dict(include_songs=False)
+        playlist_dict["owner"] = owner_username
+        playlist_dict["likes_count"] = likes_counts.get(playlist.id, 0)
+        playlist_dict["is_liked"] = playlist.id in liked_ids
+        results.append(playlist_dict)
+    
+    return {"song": song.to_dict(), "playlists": results}
 
 
 # ============================================
@@ -635,19 +851,15 @@ async def like_playlist(playlist_id: int, request: Request, db: Session = Depend
     """
     Like a playlist
     """
-    # Check if user is authenticated
-    session_username = request.session.get("username")
-    if not session_username:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+    # Check if user is authenticated (and the account hasn't been deleted)
+    session_user = get_session_user(request, db)
+    session_username = session_user.username
     
-    # Get user
-    user = db.query(models.User).filter(models.User.username == session_username).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = session_user
     
-    # Check if playlist exists
+    # Check if playlist exists (playlists of accounts awaiting purge are hidden)
     playlist = db.query(models.Playlist).filter(models.Playlist.id == playlist_id).first()
-    if not playlist:
+    if not playlist or playlist.owner.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Playlist not found")
     
     # Check if already liked
@@ -668,7 +880,10 @@ async def like_playlist(playlist_id: int, request: Request, db: Session = Depend
     db.add(new_like)
     db.commit()
     
-    return {"message": "Playlist liked", "liked": True}
+    likes_count = db.query(models.PlaylistLike).filter(models.PlaylistLike.playlist_id == playlist_id).count()
+    await events.publish(playlist_id, "likes", likes_count=likes_count)
+    
+    return {"message": "Playlist liked", "liked": True, "likes_count": likes_count}
 
 
 @app.delete("/playlists/{playlist_id}/like")
@@ -676,15 +891,11 @@ async def unlike_playlist(playlist_id: int, request: Request, db: Session = Depe
     """
     Unlike a playlist
     """
-    # Check if user is authenticated
-    session_username = request.session.get("username")
-    if not session_username:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+    # Check if user is authenticated (and the account hasn't been deleted)
+    session_user = get_session_user(request, db)
+    session_username = session_user.username
     
-    # Get user
-    user = db.query(models.User).filter(models.User.username == session_username).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = session_user
     
     # Find and delete the like
     like = db.query(models.PlaylistLike).filter(
@@ -698,15 +909,18 @@ async def unlike_playlist(playlist_id: int, request: Request, db: Session = Depe
     db.delete(like)
     db.commit()
     
-    return {"message": "Playlist unliked", "liked": False}
+    likes_count = db.query(models.PlaylistLike).filter(models.PlaylistLike.playlist_id == playlist_id).count()
+    await events.publish(playlist_id, "likes", likes_count=likes_count)
+    
+    return {"message": "Playlist unliked", "liked": False, "likes_count": likes_count}
 
 
 @app.get("/users/{username}/liked-playlists")
-async def get_liked_playlists(username: str, db: Session = Depends(get_db)):
+async def get_liked_playlists(username: str, db: Session = Depends(get_read_db)):
     """
     Get all playlists liked by a user
     """
-    user = db.query(models.User).filter(models.User.username == username).first()
+    user = db.query(models.User).filter(models.User.username == username, models.User.deleted_at.is_(None)).first()
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -714,11 +928,11 @@ async def get_liked_playlists(username: str, db: Session = Depends(get_db)):
     # Get all liked playlists
     liked_playlists = db.query(models.Playlist).join(
         models.PlaylistLike, models.Playlist.id == models.PlaylistLike.playlist_id
-    ).filter(models.PlaylistLike.user_id == user.id).all()
+    ).join(models.Playlist.owner).filter(models.PlaylistLike.user_id == user.id, models.User.deleted_at.is_(None)).all()
     
     results = []
     for playlist in liked_playlists:
-        playlist_dict = playlist.to_dict()
+        playlist_dict = playlist.to_dict(include_songs=False)
         playlist_dict["owner"] = playlist.owner.username
         playlist_dict["likes_count"] = len(playlist.likes)
         results.append(playlist_dict)
@@ -726,12 +940,38 @@ async def get_liked_playlists(username: str, db: Session = Depends(get_db)):
     return {"playlists": results}
 
 
+# ============================================
+# LIVE EVENTS ROUTES
+# ============================================
+
+@app.get("/playlists/{playlist_id}/events")
+async def stream_playlist_events(playlist_id: int, request: Request, db: Session = Depends(get_read_db)):
+    """
+    Server-Sent Events stream of playlist changes
+    Event types: likes, song_added, song_removed, songs_reordered, resync
+    """
+    playlist = db.query(models.Playlist.id).join(models.Playlist.owner).filter(
+        models.Playlist.id == playlist_id, models.User.deleted_at.is_(None)
+    ).first()
+    # Don't hold a pooled connection for the lifetime of the stream
+    db.close()
+    
+    if not playlist:
+        raise HTTPException(status_code=404, detail="Playlist not found")
+    
+    return StreamingResponse(
+        events.stream(request, playlist_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # ============================================
 # SEARCH ROUTES
 # ============================================
 
 @app.get("/search/playlists")
-async def search_playlists(q: str, limit: int = 10, request: Request = None, db: Session = Depends(get_db)):
+async def search_playlists(q: str, limit: int = 10, request: Request = None, db: Session = Depends(get_read_db)):
     """
     Search for playlists by name
     q: search query
@@ -750,14 +990,14 @@ async def search_playlists(q: str, limit: int = 10, request: Request = None, db:
                 current_user_id = user.id
     
     # Search for playlists containing the query (case-insensitive)
-    playlists = db.query(models.Playlist).filter(
-        models.Playlist.name.ilike(f"%{q}%")
+    playlists = db.query(models.Playlist).join(models.Playlist.owner).filter(
+        models.Playlist.name.ilike(f"%{q}%"), models.User.deleted_at.is_(None)
     ).limit(limit).all()
     
     # Return playlists with owner info and likes
     results = []
     for playlist in playlists:
-        playlist_dict = playlist.to_dict()
+        playlist_dict = playlist.to_dict(include_songs=False)
         playlist_dict["owner"] = playlist.owner.username
         playlist_dict["likes_count"] = len(playlist.likes)
         
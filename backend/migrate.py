@@ -0,0 +1,87 @@
+"""
+Versioned schema migrations
+
+Run once per deploy, out of band from the web workers:
+    python migrate.py            # apply pending migrations
+    python migrate.py --status   # list applied and pending migrations
+
+Each file in migrations/ is named <version>_<description>.py and defines
+upgrade(connection). Applied versions are recorded in schema_migrations.
+"""
+import argparse
+import importlib.util
+import os
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select
+from sqlalchemy.sql import func
+
+from database import engine
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", String(255), primary_key=True),
+    Column("applied_at", DateTime, server_default=func.now()),
+)
+
+
+def discover_migrations():
+    """
+    Return (version, path) for every migration file, oldest first
+    """
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        if filename.endswith(".py") and filename[0].isdigit():
+            migrations.append((filename[:-3], os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+
+def load_migration(version, path):
+    spec = importlib.util.spec_from_file_location(f"migrations.{version}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def applied_versions(connection):
+    schema_migrations.create(connection, checkfirst=True)
+    return {row.version for row in connection.execute(select(schema_migrations.c.version))}
+
+
+def migrate(bind=engine):
+    with bind.begin() as connection:
+        applied = applied_versions(connection)
+
+    pending = [(version, path) for version, path in discover_migrations() if version not in applied]
+    if not pending:
+        print("✅ Database schema is up to date")
+        return []
+
+    for version, path in pending:
+        module = load_migration(version, path)
+        # One transaction per migration (MySQL still auto-commits DDL statements)
+        with bind.begin() as connection:
+            module.upgrade(connection)
+            connection.execute(schema_migrations.insert().values(version=version))
+        print(f"✅ Applied migration {version}")
+
+    return [version for version, _ in pending]
+
+
+def status(bind=engine):
+    with bind.begin() as connection:
+        applied = applied_versions(connection)
+    for version, _ in discover_migrations():
+        print(f"{'applied' if version in applied else 'pending'}  {version}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("--status", action="store_true", help="List applied and pending migrations")
+    args = parser.parse_args()
+    if args.status:
+        status()
+    else:
+        migrate()
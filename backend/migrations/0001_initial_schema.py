@@ -0,0 +1,45 @@
+"""
+Initial schema: users, playlists, playlist_likes
+
+Databases bootstrapped by the old create_all-on-startup already have these
+tables, so creation is skipped for any table that exists.
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, JSON, MetaData, String, Table, Text
+from sqlalchemy.dialects.mysql import LONGTEXT
+from sqlalchemy.sql import func
+
+metadata = MetaData()
+
+users = Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True, autoincrement=True),
+    Column("username", String(255), unique=True, index=True, nullable=False),
+    Column("email", String(255), nullable=True),
+    Column("hashed_password", String(255), nullable=False),
+    Column("avatar", Text().with_variant(LONGTEXT, "mysql"), nullable=True),
+)
+
+playlists = Table(
+    "playlists",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True, autoincrement=True),
+    Column("name", String(255), nullable=False),
+    Column("image", Text().with_variant(LONGTEXT, "mysql"), nullable=True),
+    Column("description", Text, nullable=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("songs", JSON, nullable=True),
+)
+
+playlist_likes = Table(
+    "playlist_likes",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True, autoincrement=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("playlist_id", Integer, ForeignKey("playlists.id", ondelete="CASCADE"), nullable=False),
+    Column("created_at", DateTime, server_default=func.now()),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
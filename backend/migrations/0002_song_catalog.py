@@ -0,0 +1,37 @@
+"""
+Song catalog: songs keyed by normalized URL hash, playlist_songs references
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table, Text
+from sqlalchemy.sql import func
+
+metadata = MetaData()
+
+# Referenced by playlist_songs; created by 0001
+Table("playlists", metadata, Column("id", Integer, primary_key=True))
+
+songs = Table(
+    "songs",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True, autoincrement=True),
+    Column("url_hash", String(64), unique=True, index=True, nullable=False),
+    Column("url", Text, nullable=False),
+    Column("title", String(255), nullable=False),
+    Column("artist", String(255), nullable=False),
+    Column("album", String(255), nullable=True),
+    Column("duration", String(32), nullable=True),
+    Column("created_at", DateTime, server_default=func.now()),
+)
+
+playlist_songs = Table(
+    "playlist_songs",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True, autoincrement=True),
+    Column("playlist_id", Integer, ForeignKey("playlists.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("song_id", Integer, ForeignKey("songs.id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("entry_id", Integer, nullable=False),
+    Column("position", Integer, nullable=False, default=0),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, tables=[songs, playlist_songs], checkfirst=True)
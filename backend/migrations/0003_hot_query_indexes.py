@@ -0,0 +1,25 @@
+"""
+Indexes for the hot queries: playlists by owner, likes by playlist and by user
+
+MySQL already creates an index for each foreign key, so an index is only
+added when no existing index starts with the column.
+"""
+from sqlalchemy import Index, MetaData, Table, inspect
+
+INDEXES = [
+    ("ix_playlists_user_id", "playlists", "user_id"),
+    ("ix_playlist_likes_playlist_id", "playlist_likes", "playlist_id"),
+    ("ix_playlist_likes_user_id", "playlist_likes", "user_id"),
+]
+
+
+def upgrade(connection):
+    inspector = inspect(connection)
+    metadata = MetaData()
+
+    for name, table_name, column in INDEXES:
+        existing = inspector.get_indexes(table_name)
+        if any(index["column_names"][:1] == [column] for index in existing):
+            continue
+        table = Table(table_name, metadata, autoload_with=connection)
+        Index(name, table.c[column]).create(connection)
@@ -0,0 +1,95 @@
+"""
+Playlist aggregates: songs.duration_seconds, playlists.song_count and
+playlists.total_duration_seconds, backfilled from existing rows
+"""
+import json
+
+from sqlalchemy import inspect, text
+
+BATCH_SIZE = 500
+
+COLUMNS = [
+    ("songs", "duration_seconds", "INTEGER NULL"),
+    ("playlists", "song_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("playlists", "total_duration_seconds", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+
+def upgrade(connection):
+    inspector = inspect(connection)
+    for table, column, definition in COLUMNS:
+        if column not in {c["name"] for c in inspector.get_columns(table)}:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+
+    # Catalog songs: parse the stored duration strings
+    songs = connection.execute(text("SELECT id, duration FROM songs WHERE duration IS NOT NULL")).all()
+    updates = [{"song_id": row.id, "seconds": parse_duration(row.duration)} for row in songs]
+    for start in range(0, len(updates), BATCH_SIZE):
+        connection.execute(
+            text("UPDATE songs SET duration_seconds = :seconds WHERE id = :song_id"),
+            updates[start:start + BATCH_SIZE]
+        )
+
+    # Playlists already on the catalog: aggregate their entries in SQL
+    connection.execute(text("""
+        UPDATE playlists SET
+            song_count = (SELECT COUNT(*) FROM playlist_songs WHERE playlist_songs.playlist_id = playlists.id),
+            total_duration_seconds = (
+                SELECT COALESCE(SUM(songs.duration_seconds), 0)
+                FROM playlist_songs JOIN songs ON songs.id = playlist_songs.song_id
+                WHERE playlist_songs.playlist_id = playlists.id
+            )
+        WHERE EXISTS (SELECT 1 FROM playlist_songs WHERE playlist_songs.playlist_id = playlists.id)
+    """))
+
+    # Playlists still holding legacy JSON songs: aggregate in Python, in keyset batches
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            text("""
+                SELECT id, songs FROM playlists
+                WHERE id > :last_id
+                AND NOT EXISTS (SELECT 1 FROM playlist_songs WHERE playlist_songs.playlist_id = playlists.id)
+                ORDER BY id LIMIT :limit
+            """),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        updates = []
+        for row in rows:
+            legacy_songs = _load_json(row.songs)
+            updates.append({
+                "playlist_id": row.id,
+                "song_count": len(legacy_songs),
+                "total": sum(parse_duration(song.get("duration")) or 0 for song in legacy_songs),
+            })
+        connection.execute(
+            text("UPDATE playlists SET song_count = :song_count, total_duration_seconds = :total WHERE id = :playlist_id"),
+            updates
+        )
+
+
+def parse_duration(value):
+    # Frozen copy of catalog.parse_duration as of this migration; migrations
+    # don't import app code, so later changes can't alter what this one did
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value) if value >= 0 else None
+    parts = str(value).strip().split(":")
+    if len(parts) > 3 or not all(part.strip().isdigit() for part in parts):
+        return None
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def _load_json(value):
+    # Raw SQL returns the JSON column as text on some drivers
+    if isinstance(value, (str, bytes)):
+        value = json.loads(value)
+    return value or []
@@ -0,0 +1,12 @@
+"""
+users.deleted_at: accounts are tombstoned on delete and purged in the background
+"""
+from sqlalchemy import inspect, text
+
+
+def upgrade(connection):
+    inspector = inspect(connection)
+    if "deleted_at" not in {column["name"] for column in inspector.get_columns("users")}:
+        connection.execute(text("ALTER TABLE users ADD COLUMN deleted_at DATETIME NULL"))
+    if "ix_users_deleted_at" not in {index["name"] for index in inspector.get_indexes("users")}:
+        connection.execute(text("CREATE INDEX ix_users_deleted_at ON users (deleted_at)"))
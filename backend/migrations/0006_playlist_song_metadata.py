@@ -0,0 +1,22 @@
+"""
+Per-entry song metadata on playlist_songs, so the first person to add a URL
+no longer decides the title/artist/album/duration everyone else sees
+
+Existing entries keep NULLs and fall back to the catalog row.
+"""
+from sqlalchemy import inspect, text
+
+COLUMNS = [
+    ("title", "VARCHAR(255) NULL"),
+    ("artist", "VARCHAR(255) NULL"),
+    ("album", "VARCHAR(255) NULL"),
+    ("duration", "VARCHAR(32) NULL"),
+    ("duration_seconds", "INTEGER NULL"),
+]
+
+
+def upgrade(connection):
+    existing = {column["name"] for column in inspect(connection).get_columns("playlist_songs")}
+    for column, definition in COLUMNS:
+        if column not in existing:
+            connection.execute(text(f"ALTER TABLE playlist_songs ADD COLUMN {column} {definition}"))
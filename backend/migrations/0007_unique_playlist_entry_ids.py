@@ -0,0 +1,41 @@
+"""
+Unique (playlist_id, entry_id) on playlist_songs, so two concurrent adds can
+never hand out the same client-visible song ID
+
+Entries that already share an ID are renumbered past the playlist's highest
+ID before the index is created; the first entry (by position) keeps its ID.
+"""
+from sqlalchemy import Index, MetaData, Table, inspect, text
+
+INDEX_NAME = "uq_playlist_songs_playlist_entry"
+
+
+def upgrade(connection):
+    if any(index["name"] == INDEX_NAME for index in inspect(connection).get_indexes("playlist_songs")):
+        return
+
+    duplicates = connection.execute(text("""
+        SELECT playlist_id, entry_id FROM playlist_songs
+        GROUP BY playlist_id, entry_id HAVING COUNT(*) > 1
+    """)).all()
+    for row in duplicates:
+        next_id = connection.execute(
+            text("SELECT MAX(entry_id) FROM playlist_songs WHERE playlist_id = :playlist_id"),
+            {"playlist_id": row.playlist_id}
+        ).scalar() + 1
+        ids = connection.execute(
+            text("""
+                SELECT id FROM playlist_songs
+                WHERE playlist_id = :playlist_id AND entry_id = :entry_id
+                ORDER BY position, id
+            """),
+            {"playlist_id": row.playlist_id, "entry_id": row.entry_id}
+        ).scalars().all()
+        for offset, entry_row_id in enumerate(ids[1:]):
+            connection.execute(
+                text("UPDATE playlist_songs SET entry_id = :entry_id WHERE id = :id"),
+                {"entry_id": next_id + offset, "id": entry_row_id}
+            )
+
+    table = Table("playlist_songs", MetaData(), autoload_with=connection)
+    Index(INDEX_NAME, table.c.playlist_id, table.c.entry_id, unique=True).create(connection)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Text, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Text, DateTime, Index
 from sqlalchemy.dialects.mysql import LONGTEXT
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -11,20 +11,26 @@ class User(Base):
     username = Column(String(255), unique=True, index=True, nullable=False)
     email = Column(String(255), nullable=True)
     hashed_password = Column(String(255), nullable=False)
-    avatar = Column(LONGTEXT, nullable=True)  # LONGTEXT for large base64 images or URLs
+    avatar = Column(Text().with_variant(LONGTEXT, "mysql"), nullable=True)  # LONGTEXT for large base64 images or URLs
+    deleted_at = Column(DateTime, nullable=True, index=True)  # Tombstone; rows are purged in the background
     
+    # Child rows are removed by the database's ON DELETE CASCADE (passive_deletes),
+    # so deleting a parent never loads its children into memory
     # Relationship to playlists
-    playlists = relationship("Playlist", back_populates="owner", cascade="all, delete-orphan")
+    playlists = relationship("Playlist", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
     # Relationship to liked playlists
-    liked_playlists = relationship("PlaylistLike", back_populates="user", cascade="all, delete-orphan")
+    liked_playlists = relationship("PlaylistLike", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
 
-    def to_dict(self):
+    def to_dict(self, playlist_count=None):
+        # Batch callers pass a precomputed count to avoid loading every playlist
+        if playlist_count is None:
+            playlist_count = len(self.playlists) if self.playlists else 0
         return {
             "id": self.id,
             "username": self.username,
             "email": self.email,
             "avatar": self.avatar,
-            "playlist_count": len(self.playlists) if self.playlists else 0
+            "playlist_count": playlist_count
         }
 
 
@@ -33,32 +39,118 @@ class Playlist(Base):
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(255), nullable=False)
-    image = Column(LONGTEXT, nullable=True)  # LONGTEXT for large base64 images
+    image = Column(Text().with_variant(LONGTEXT, "mysql"), nullable=True)  # LONGTEXT for large base64 images
     description = Column(Text, nullable=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    songs = Column(JSON, nullable=True, default=[])  # Store songs as JSON array
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    songs = Column(JSON, nullable=True, default=[])  # Legacy inline songs, moved to the catalog by backfill_songs.py
+    # Aggregates maintained by the song routes so cards never need the songs
+    song_count = Column(Integer, nullable=False, default=0, server_default="0")
+    total_duration_seconds = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relationship to user
     owner = relationship("User", back_populates="playlists")
     # Relationship to likes
-    likes = relationship("PlaylistLike", back_populates="playlist", cascade="all, delete-orphan")
+    likes = relationship("PlaylistLike", back_populates="playlist", cascade="all, delete-orphan", passive_deletes=True)
+    # Relationship to catalog songs (ordered entries)
+    entries = relationship("PlaylistSong", back_populates="playlist", order_by="PlaylistSong.position", cascade="all, delete-orphan", passive_deletes=True)
 
-    def to_dict(self):
-        return {
+    def song_list(self):
+        # Playlists not yet backfilled still carry their songs in the legacy JSON column
+        if self.entries:
+            return [entry.to_dict() for entry in self.entries]
+        return self.songs if self.songs else []
+
+    def to_dict(self, include_songs=True):
+        playlist_dict = {
             "id": self.id,
             "name": self.name,
             "image": self.image,
             "description": self.description,
-            "songs": self.songs if self.songs else []
+            "song_count": self.song_count or 0,
+            "total_duration_seconds": self.total_duration_seconds or 0
+        }
+        # List endpoints skip the songs array; cards only need the aggregates
+        if include_songs:
+            playlist_dict["songs"] = self.song_list()
+        return playlist_dict
+
+
+class Song(Base):
+    __tablename__ = "songs"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    url_hash = Column(String(64), unique=True, index=True, nullable=False)  # sha256 of the normalized URL
+    url = Column(Text, nullable=False)
+    title = Column(String(255), nullable=False)
+    artist = Column(String(255), nullable=False)
+    album = Column(String(255), nullable=True)
+    duration = Column(String(32), nullable=True)  # Display form, e.g. "3:45"
+    duration_seconds = Column(Integer, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+
+    # Relationship to playlist entries that reference this song
+    entries = relationship("PlaylistSong", back_populates="song")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "title": self.title,
+            "artist": self.artist,
+            "duration": self.duration,
+            "duration_seconds": self.duration_seconds,
+            "album": self.album,
+            "url": self.url
         }
 
 
+class PlaylistSong(Base):
+    __tablename__ = "playlist_songs"
+    __table_args__ = (
+        # Entry IDs are what clients use to remove and reorder songs
+        Index("uq_playlist_songs_playlist_entry", "playlist_id", "entry_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    playlist_id = Column(Integer, ForeignKey("playlists.id", ondelete="CASCADE"), nullable=False, index=True)
+    song_id = Column(Integer, ForeignKey("songs.id", ondelete="CASCADE"), nullable=False, index=True)
+    entry_id = Column(Integer, nullable=False)  # Per-playlist song ID exposed to clients
+    position = Column(Integer, nullable=False, default=0)
+    # Metadata as given by whoever added this entry; the catalog row only dedupes the URL
+    title = Column(String(255), nullable=True)
+    artist = Column(String(255), nullable=True)
+    album = Column(String(255), nullable=True)
+    duration = Column(String(32), nullable=True)
+    duration_seconds = Column(Integer, nullable=True)
+
+    # Relationships
+    playlist = relationship("Playlist", back_populates="entries")
+    song = relationship("Song", back_populates="entries", lazy="joined")
+
+    def has_own_metadata(self):
+        # Entries created before per-entry metadata fall back to the catalog row
+        return self.title is not None
+
+    def to_dict(self):
+        song_dict = self.song.to_dict()
+        song_dict["song_id"] = song_dict["id"]
+        song_dict["id"] = self.entry_id
+        if self.has_own_metadata():
+            song_dict.update(
+                title=self.title,
+                artist=self.artist,
+                album=self.album,
+                duration=self.duration,
+                duration_seconds=self.duration_seconds
+            )
+        return song_dict
+
+
 class PlaylistLike(Base):
     __tablename__ = "playlist_likes"
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    playlist_id = Column(Integer, ForeignKey("playlists.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    playlist_id = Column(Integer, ForeignKey("playlists.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at = Column(DateTime, server_default=func.now())
     
     # Relationships
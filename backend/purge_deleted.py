@@ -0,0 +1,22 @@
+"""
+Purge tombstoned user accounts
+
+Account deletion tombstones the user and purges their rows in a background
+task. This sweep finishes any purge that was interrupted, e.g. by a deploy.
+Tombstones younger than the grace period are skipped, since their
+background purge may still be running.
+
+Usage: python purge_deleted.py [--batch-size 500] [--grace-seconds 3600]
+"""
+import argparse
+
+from deletion import PURGE_BATCH_SIZE, PURGE_GRACE_SECONDS, purge_tombstoned_users
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Purge tombstoned user accounts in batches")
+    parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE, help="Rows deleted per transaction")
+    parser.add_argument("--grace-seconds", type=int, default=PURGE_GRACE_SECONDS,
+                        help="Skip accounts tombstoned more recently than this")
+    args = parser.parse_args()
+    count = purge_tombstoned_users(batch_size=args.batch_size, grace_seconds=args.grace_seconds)
+    print(f"✅ PURGE DONE: {count} tombstoned accounts processed")
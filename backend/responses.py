@@ -0,0 +1,146 @@
+import functools
+import gzip
+import inspect
+import os
+
+import orjson
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only gzip is offered
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson
+    """
+    def render(self, content) -> bytes:
+        try:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Something orjson doesn't know (ORM object, Decimal, ...): encode it first
+            return orjson.dumps(jsonable_encoder(content), option=orjson.OPT_NON_STR_KEYS)
+
+
+def _wrap_endpoint(endpoint):
+    """
+    Hand plain dict results straight to FastJSONResponse so FastAPI skips
+    its jsonable_encoder pass over the whole payload
+    """
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        content = await endpoint(*args, **kwargs)
+        if isinstance(content, dict):
+            return FastJSONResponse(content)
+        return content
+
+    return wrapper
+
+
+def _has_response_model(endpoint, response_model) -> bool:
+    if isinstance(response_model, DefaultPlaceholder):
+        # Not passed to the decorator: FastAPI infers it from the return annotation
+        return inspect.signature(endpoint).return_annotation is not inspect.Signature.empty
+    return response_model is not None
+
+
+class FastJSONRoute(APIRoute):
+    def __init__(self, path, endpoint, **kwargs):
+        # Routes with a response model still need FastAPI's validation and encoding
+        if not _has_response_model(endpoint, kwargs.get("response_model")):
+            endpoint = _wrap_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _negotiate_encoding(accept_encoding: str):
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        # Low quality keeps per-request CPU close to gzip while still beating it on size
+        return brotli.compress(body, quality=4)
+    return gzip.compress(body, compresslevel=6)
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli/gzip compression for complete responses above a size threshold
+
+    Streaming responses (e.g. Server-Sent Events) are passed through untouched.
+    """
+    def __init__(self, app, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = _negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            pending_start, start_message = start_message, None
+            headers = MutableHeaders(raw=pending_start["headers"])
+            body = message.get("body", b"")
+            compressible = (
+                not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+                and "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            )
+            if compressible:
+                body = _compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = {**message, "body": body}
+
+            await send(pending_start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -22,6 +22,42 @@ function Playlist({ onLogout }) {
     fetchPlaylist()
   }, [playlistId])
 
+  useEffect(() => {
+    // Live updates: apply the deltas the server pushes instead of refetching
+    const events = new EventSource(`${api.defaults.baseURL}/playlists/${playlistId}/events`, { withCredentials: true })
+
+    events.addEventListener('likes', (e) => {
+      const { likes_count } = JSON.parse(e.data)
+      setPlaylist(prev => prev && { ...prev, likes_count })
+    })
+    events.addEventListener('song_added', (e) => {
+      const { song } = JSON.parse(e.data)
+      setPlaylist(prev => addSong(prev, song))
+    })
+    events.addEventListener('song_removed', (e) => {
+      const { song_id } = JSON.parse(e.data)
+      setPlaylist(prev => removeSong(prev, song_id))
+    })
+    events.addEventListener('songs_reordered', (e) => {
+      const { song_ids } = JSON.parse(e.data)
+      setPlaylist(prev => {
+        if (!prev) return prev
+        const songsById = new Map((prev.songs || []).map(s => [s.id, s]))
+        return { ...prev, songs: song_ids.map(id => songsById.get(id)).filter(Boolean) }
+      })
+    })
+    // Sent when this client fell too far behind to patch
+    events.addEventListener('resync', () => fetchPlaylist())
+    // Events published while the stream was down (deploys, restarts) are gone: refetch on reconnect
+    let connectedBefore = false
+    events.addEventListener('open', () => {
+      if (connectedBefore) fetchPlaylist()
+      connectedBefore = true
+    })
+
+    return () => events.close()
+  }, [playlistId])
+
   useEffect(() => {
     // Close menu when clicking outside
     const handleClickOutside = (event) => {
@@ -55,6 +91,16 @@ function Playlist({ onLogout }) {
     }
   }
 
+  const addSong = (prev, song) => {
+    if (!prev || prev.songs?.some(s => s.id === song.id)) return prev
+    return { ...prev, songs: [...(prev.songs || []), song] }
+  }
+
+  const removeSong = (prev, songId) => {
+    if (!prev) return prev
+    return { ...prev, songs: (prev.songs || []).filter(s => s.id !== songId) }
+  }
+
   const formatDuration = (duration) => {
     // Assuming duration is in format "3:45"
     return duration || '-'
@@ -62,10 +108,10 @@ function Playlist({ onLogout }) {
 
   const handleAddSong = async (songData) => {
     try {
-      await api.post(`/playlists/${playlistId}/songs`, songData)
+      const response = await api.post(`/playlists/${playlistId}/songs`, songData)
       
-      // Refresh playlist to show new song
-      await fetchPlaylist()
+      // Show the new song right away (the live event for it is ignored as a duplicate)
+      setPlaylist(prev => addSong(prev, response.data.song))
     } catch (err) {
       console.error('Error adding song:', err)
       throw new Error(err.response?.data?.detail || 'Failed to add song')
@@ -80,8 +126,8 @@ function Playlist({ onLogout }) {
     try {
       await api.delete(`/playlists/${playlistId}/songs/${songId}`)
       
-      // Refresh playlist to show updated list
-      await fetchPlaylist()
+      // Update list locally instead of refetching the playlist
+      setPlaylist(prev => removeSong(prev, songId))
       setOpenMenuId(null)
     } catch (err) {
       console.error('Error deleting song:', err)
@@ -97,14 +143,13 @@ function Playlist({ onLogout }) {
     if (!playlist) return
     
     try {
-      if (playlist.is_liked) {
-        await api.delete(`/playlists/${playlistId}/like`)
-      } else {
-        await api.post(`/playlists/${playlistId}/like`)
-      }
+      const response = playlist.is_liked
+        ? await api.delete(`/playlists/${playlistId}/like`)
+        : await api.post(`/playlists/${playlistId}/like`)
       
-      // Refresh playlist
-      await fetchPlaylist()
+      // Patch like state from the response instead of refetching
+      const { liked, likes_count } = response.data
+      setPlaylist(prev => prev && { ...prev, is_liked: liked, likes_count: likes_count ?? prev.likes_count })
     } catch (err) {
       console.error('Error toggling like:', err)
     }